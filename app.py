@@ -1,5 +1,8 @@
-from flask import Flask, render_template_string
+from flask import Flask, Response, render_template_string
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, insert
+from contextlib import contextmanager
+from itertools import islice
 import os
 from datetime import datetime
 
@@ -7,13 +10,20 @@ from datetime import datetime
 app = Flask(__name__)
 
 # Configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///hr_database.db'
+# Same database file the CLI uses (Flask-SQLAlchemy would otherwise resolve it under instance/)
+app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.abspath('hr_database.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'query_cache_size': 1200}
 app.config['SECRET_KEY'] = 'your-secret-key-here'
 
 # Initialize SQLAlchemy
 db = SQLAlchemy(app)
 
+# Set HR_STRICT_LOADING=1 in development/tests to make lazy loads that would
+# emit SQL raise instead of silently turning into N+1 queries
+STRICT_LOADING = os.environ.get('HR_STRICT_LOADING', '').lower() in ('1', 'true', 'yes')
+LAZY_LOAD = 'raise_on_sql' if STRICT_LOADING else 'select'
+
 # Database Models
 class JobTitles(db.Model):
     __tablename__ = 'JobTitles'
@@ -23,7 +33,7 @@ class JobTitles(db.Model):
     MaxSalary = db.Column(db.Numeric(10, 2), nullable=False)
     
     # Relationships
-    employees = db.relationship('Employees', backref='job_title', lazy=True)
+    employees = db.relationship('Employees', back_populates='job_title', lazy=LAZY_LOAD)
 
 class Departments(db.Model):
     __tablename__ = 'Departments'
@@ -33,12 +43,18 @@ class Departments(db.Model):
     HeadID = db.Column(db.Integer, db.ForeignKey('Employees.EmployeeID'), nullable=True)
     
     # Relationships
-    employees = db.relationship('Employees', backref='department', lazy=True)
-    projects = db.relationship('Projects', backref='department', lazy=True)
-    department_head = db.relationship('Employees', foreign_keys=[HeadID], backref='headed_departments')
+    employees = db.relationship('Employees', foreign_keys='Employees.DepartmentID',
+                                back_populates='department', lazy=LAZY_LOAD)
+    projects = db.relationship('Projects', back_populates='department', lazy=LAZY_LOAD)
+    department_head = db.relationship('Employees', foreign_keys=[HeadID], lazy=LAZY_LOAD)
 
 class Employees(db.Model):
     __tablename__ = 'Employees'
+    __table_args__ = (
+        db.Index('idx_employees_name', 'LastName', 'FirstName'),
+        db.Index('idx_employees_department', 'DepartmentID'),
+        db.Index('idx_employees_department_salary', 'DepartmentID', db.text('Salary DESC')),
+    )
     EmployeeID = db.Column(db.Integer, primary_key=True, autoincrement=True)
     FirstName = db.Column(db.String(50), nullable=False)
     LastName = db.Column(db.String(50), nullable=False)
@@ -53,15 +69,23 @@ class Employees(db.Model):
     Salary = db.Column(db.Numeric(10, 2), nullable=False)
     
     # Relationships
-    managed_employees = db.relationship('Employees', backref=db.backref('manager', remote_side=[EmployeeID]))
-    employee_projects = db.relationship('EmployeeProjects', backref='employee', lazy=True)
-    attendance_records = db.relationship('Attendance', backref='employee', lazy=True)
-    leave_requests = db.relationship('LeaveRequests', backref='employee', lazy=True)
-    performance_reviews = db.relationship('PerformanceReviews', backref='employee', lazy=True)
-    payroll_records = db.relationship('Payroll', backref='employee', lazy=True)
+    job_title = db.relationship('JobTitles', back_populates='employees', lazy='joined')
+    department = db.relationship('Departments', foreign_keys=[DepartmentID],
+                                 back_populates='employees', lazy='joined')
+    manager = db.relationship('Employees', remote_side=[EmployeeID], lazy='joined', innerjoin=False)
+    employee_projects = db.relationship('EmployeeProjects', back_populates='employee', lazy='selectin')
+    attendance_records = db.relationship('Attendance', back_populates='employee', lazy=LAZY_LOAD)
+    leave_requests = db.relationship('LeaveRequests', foreign_keys='LeaveRequests.EmployeeID',
+                                     back_populates='employee', lazy=LAZY_LOAD)
+    performance_reviews = db.relationship('PerformanceReviews', foreign_keys='PerformanceReviews.EmployeeID',
+                                          back_populates='employee', lazy=LAZY_LOAD)
+    payroll_records = db.relationship('Payroll', back_populates='employee', lazy=LAZY_LOAD)
 
 class Projects(db.Model):
     __tablename__ = 'Projects'
+    __table_args__ = (
+        db.Index('idx_projects_start_date', 'StartDate', 'EndDate'),
+    )
     ProjectID = db.Column(db.Integer, primary_key=True, autoincrement=True)
     ProjectName = db.Column(db.String(200), nullable=False)
     DepartmentID = db.Column(db.Integer, db.ForeignKey('Departments.DepartmentID'), nullable=False)
@@ -70,26 +94,43 @@ class Projects(db.Model):
     Budget = db.Column(db.Numeric(12, 2), nullable=True)
     
     # Relationships
-    employee_projects = db.relationship('EmployeeProjects', backref='project', lazy=True)
+    department = db.relationship('Departments', back_populates='projects', lazy=LAZY_LOAD)
+    employee_projects = db.relationship('EmployeeProjects', back_populates='project', lazy=LAZY_LOAD)
 
 class EmployeeProjects(db.Model):
     __tablename__ = 'EmployeeProjects'
+    __table_args__ = (
+        db.Index('idx_employee_projects_project', 'ProjectID'),
+    )
     EmployeeID = db.Column(db.Integer, db.ForeignKey('Employees.EmployeeID'), primary_key=True)
     ProjectID = db.Column(db.Integer, db.ForeignKey('Projects.ProjectID'), primary_key=True)
     Role = db.Column(db.String(100), nullable=False)
     AllocationPercent = db.Column(db.Numeric(5, 2), default=100.00)
+    
+    # Relationships
+    employee = db.relationship('Employees', back_populates='employee_projects', lazy=LAZY_LOAD)
+    project = db.relationship('Projects', back_populates='employee_projects', lazy=LAZY_LOAD)
 
 class Attendance(db.Model):
     __tablename__ = 'Attendance'
+    __table_args__ = (
+        db.Index('idx_attendance_date', 'Date', 'EmployeeID', 'Status'),
+    )
     AttendanceID = db.Column(db.Integer, primary_key=True, autoincrement=True)
     EmployeeID = db.Column(db.Integer, db.ForeignKey('Employees.EmployeeID'), nullable=False)
     Date = db.Column(db.Date, nullable=False)
     CheckInTime = db.Column(db.Time, nullable=True)
     CheckOutTime = db.Column(db.Time, nullable=True)
     Status = db.Column(db.String(20), nullable=False)
+    
+    # Relationships
+    employee = db.relationship('Employees', back_populates='attendance_records', lazy=LAZY_LOAD)
 
 class LeaveRequests(db.Model):
     __tablename__ = 'LeaveRequests'
+    __table_args__ = (
+        db.Index('idx_leave_status', 'Status'),
+    )
     LeaveID = db.Column(db.Integer, primary_key=True, autoincrement=True)
     EmployeeID = db.Column(db.Integer, db.ForeignKey('Employees.EmployeeID'), nullable=False)
     StartDate = db.Column(db.Date, nullable=False)
@@ -99,10 +140,15 @@ class LeaveRequests(db.Model):
     ApprovedBy = db.Column(db.Integer, db.ForeignKey('Employees.EmployeeID'), nullable=True)
     
     # Relationships
-    approver = db.relationship('Employees', foreign_keys=[ApprovedBy], backref='approved_leaves')
+    employee = db.relationship('Employees', foreign_keys=[EmployeeID], back_populates='leave_requests',
+                               lazy=LAZY_LOAD)
+    approver = db.relationship('Employees', foreign_keys=[ApprovedBy], lazy=LAZY_LOAD)
 
 class PerformanceReviews(db.Model):
     __tablename__ = 'PerformanceReviews'
+    __table_args__ = (
+        db.Index('idx_reviews_date', 'ReviewDate', 'Rating'),
+    )
     ReviewID = db.Column(db.Integer, primary_key=True, autoincrement=True)
     EmployeeID = db.Column(db.Integer, db.ForeignKey('Employees.EmployeeID'), nullable=False)
     ReviewerID = db.Column(db.Integer, db.ForeignKey('Employees.EmployeeID'), nullable=False)
@@ -111,10 +157,15 @@ class PerformanceReviews(db.Model):
     Comments = db.Column(db.Text, nullable=True)
     
     # Relationships
-    reviewer = db.relationship('Employees', foreign_keys=[ReviewerID], backref='conducted_reviews')
+    employee = db.relationship('Employees', foreign_keys=[EmployeeID], back_populates='performance_reviews',
+                               lazy=LAZY_LOAD)
+    reviewer = db.relationship('Employees', foreign_keys=[ReviewerID], lazy=LAZY_LOAD)
 
 class Payroll(db.Model):
     __tablename__ = 'Payroll'
+    __table_args__ = (
+        db.Index('idx_payroll_year', 'Year', 'EmployeeID'),
+    )
     PayrollID = db.Column(db.Integer, primary_key=True, autoincrement=True)
     EmployeeID = db.Column(db.Integer, db.ForeignKey('Employees.EmployeeID'), nullable=False)
     Month = db.Column(db.Integer, nullable=False)
@@ -123,32 +174,76 @@ class Payroll(db.Model):
     Allowances = db.Column(db.Numeric(10, 2), default=0.00)
     Deductions = db.Column(db.Numeric(10, 2), default=0.00)
     NetSalary = db.Column(db.Numeric(10, 2), nullable=False)
+    
+    # Relationships
+    employee = db.relationship('Employees', back_populates='payroll_records', lazy=LAZY_LOAD)
+
+def create_indexes(bind=None):
+    """Create model indexes missing from an existing database"""
+    for table in db.metadata.tables.values():
+        for index in table.indexes:
+            index.create(bind or db.engine, checkfirst=True)
+
+@contextmanager
+def count_queries():
+    """Count SQL statements executed on the engine inside the block"""
+    counter = {'count': 0}
+    
+    def _count(*args):
+        counter['count'] += 1
+    
+    event.listen(db.engine, 'before_cursor_execute', _count)
+    try:
+        yield counter
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', _count)
+
+def bulk_insert(model, rows, page_size=5000):
+    """Insert an iterable of column dicts for a model in one transaction
+    
+    Rows are sent in executemany batches of page_size; returns the number inserted.
+    """
+    rows = iter(rows)
+    total = 0
+    try:
+        while True:
+            batch = list(islice(rows, page_size))
+            if not batch:
+                break
+            db.session.execute(insert(model), batch)
+            total += len(batch)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return total
 
 # Utility functions
 def get_employee_full_name(employee):
     """Get full name of employee"""
     return f"{employee.FirstName} {employee.LastName}"
 
-def format_currency(amount):
-    """Format currency amount"""
-    if amount is None:
-        return "$0.00"
-    return f"${float(amount):,.2f}"
+_CURRENCY_NONE = "$0.00"
+
+def format_currency(amount, _fmt="${:,.2f}".format):
+    """Format currency amount (Decimal values are formatted without a float round-trip)"""
+    return _CURRENCY_NONE if amount is None else _fmt(amount)
 
 def format_date(date_obj):
     """Format date object"""
-    if date_obj is None:
-        return "N/A"
+    # SQLite hands dates back as text, so check for str first
     if isinstance(date_obj, str):
         return date_obj
+    if date_obj is None:
+        return "N/A"
     return date_obj.strftime('%Y-%m-%d')
 
 def format_time(time_obj):
     """Format time object"""
-    if time_obj is None:
-        return "N/A"
     if isinstance(time_obj, str):
         return time_obj
+    if time_obj is None:
+        return "N/A"
     return time_obj.strftime('%H:%M:%S')
 
 # Context processors for templates
@@ -161,10 +256,8 @@ def utility_processor():
         'format_time': format_time
     }
 
-# Basic route for testing
-@app.route('/')
-def index():
-    return """
+# Status page, encoded once at import and served as-is
+_INDEX_HTML = """
     <!DOCTYPE html>
     <html>
     <head>
@@ -195,11 +288,20 @@ def index():
         </div>
     </body>
     </html>
-    """
+""".encode('utf-8')
+
+# Basic route for testing
+@app.route('/', endpoint='index')
+def index():
+    return Response(_INDEX_HTML, mimetype='text/html')
 
 if __name__ == '__main__':
-    with app.app_context():
-        db.create_all()
+    # Build the whole schema in one transaction (one commit instead of one per CREATE)
+    with app.app_context(), db.engine.begin() as conn:
+        # pysqlite does not open a transaction before DDL on its own
+        conn.exec_driver_sql('BEGIN')
+        db.metadata.create_all(conn)
+        create_indexes(conn)
     print("HR Database Management System initialized!")
     print("Database tables created successfully.")
     print("Use 'python hr_cli.py' to access the CLI interface.")
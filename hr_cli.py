@@ -4,40 +4,166 @@ HR Database Management System - Command Line Interface
 A comprehensive CLI for managing HR data, employees, departments, projects, and more.
 """
 
+import atexit
 import click
+import functools
+import io
 import sqlite3
 import os
+import sys
+from contextlib import redirect_stdout
 from datetime import datetime, date, time
-from tabulate import tabulate
-from colorama import init, Fore, Back, Style
-
-# Initialize colorama for cross-platform colored output
-init(autoreset=True)
+from time import monotonic
+from itertools import groupby
+from operator import itemgetter
+from init_db import TABLES, count_records, split_sql_statements, init_database, verify_database, run_sample_queries
+
+class _NoColor:
+    """Stand-in for colorama's Fore/Style that emits no ANSI codes"""
+    def __getattr__(self, name):
+        return ''
+
+@functools.lru_cache(maxsize=1)
+def _styles():
+    """Return (Fore, Style), importing colorama on first colored output"""
+    if sys.stdout.isatty():
+        # Initialize colorama for cross-platform colored output
+        from colorama import init, Fore, Style
+        init(autoreset=True)
+        return Fore, Style
+    # Piped/redirected output: skip colorama's stdout wrapper entirely
+    return _NoColor(), _NoColor()
+
+class _LazyAnsi:
+    """Fore/Style proxy so `--help` and friends never import colorama"""
+    def __init__(self, index):
+        self._index = index
+    
+    def __getattr__(self, name):
+        value = getattr(_styles()[self._index], name)
+        setattr(self, name, value)
+        return value
+
+class _LazyPrefix:
+    """Colored message prefix, built once on first use"""
+    def __init__(self, color, symbol):
+        self._color = color
+        self._symbol = symbol
+    
+    @functools.cached_property
+    def _text(self):
+        return f"{getattr(Fore, self._color)}{self._symbol} "
+    
+    def __format__(self, spec):
+        return format(self._text, spec)
+
+Fore = _LazyAnsi(0)
+Style = _LazyAnsi(1)
+
+# Message prefixes built once instead of on every error/success path
+_ERR_PREFIX = _LazyPrefix('RED', '❌')
+_OK_PREFIX = _LazyPrefix('GREEN', '✅')
+_QUERY_PREFIX = _LazyPrefix('YELLOW', 'Query')
 
 # Database file path
 DB_FILE = 'hr_database.db'
 
-def get_db_connection():
-    """Get database connection"""
-    if not os.path.exists(DB_FILE):
-        click.echo(f"{Fore.RED}❌ Database not found! Please run 'python init_db.py' first.{Style.RESET_ALL}")
-        return None
-    return sqlite3.connect(DB_FILE)
+# Rows pulled per fetchmany() call when streaming large listings
+FETCH_BATCH_SIZE = 1000
+
+# Table output format, set by the top-level --format option
+TABLE_FORMATS = ('grid', 'simple', 'github', 'plain', 'tsv')
+_table_format = 'grid'
+
+# Report results are reused for up to this many seconds within one process
+RESULT_CACHE_TTL = 60
+
+# Process-wide connection, opened on first use and reused by every command
+_conn = None
+
+# Connection tuning applied once when the shared connection is opened
+_CONNECTION_PRAGMAS = """
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA cache_size=-65536;
+    PRAGMA mmap_size=268435456;
+    PRAGMA foreign_keys=ON;
+"""
+
+def _close_db_connection():
+    """Close the shared database connection at interpreter exit"""
+    global _conn
+    if _conn is not None:
+        # Let SQLite refresh planner statistics it found stale during this run
+        try:
+            _conn.executescript("PRAGMA query_only=OFF; PRAGMA optimize;")
+        except sqlite3.Error:
+            pass
+        _conn.close()
+        _conn = None
+
+atexit.register(_close_db_connection)
 
-def format_currency(amount):
-    """Format currency amount"""
-    if amount is None:
-        return "$0.00"
-    return f"${float(amount):,.2f}"
+def get_db_connection(read_only=False):
+    """Get the shared database connection
+
+    read_only toggles PRAGMA query_only so list/show commands cannot write.
+    """
+    global _conn
+    if _conn is None:
+        if not os.path.exists(DB_FILE):
+            click.echo(f"{_ERR_PREFIX}Database not found! Please run 'python init_db.py' first.{Style.RESET_ALL}")
+            return None
+        conn = sqlite3.connect(DB_FILE, check_same_thread=False, cached_statements=256)
+        try:
+            conn.executescript(_CONNECTION_PRAGMAS)
+        except sqlite3.DatabaseError as e:
+            # Don't cache a handle to a file SQLite can't read (e.g. "file is not a database")
+            conn.close()
+            click.echo(f"{_ERR_PREFIX}Database unreadable ({e})! Please run 'python init_db.py' to rebuild it.{Style.RESET_ALL}")
+            return None
+        conn.create_function('fmt_money', 1, format_currency, deterministic=True)
+        _conn = conn
+    _conn.execute(f"PRAGMA query_only={'ON' if read_only else 'OFF'}")
+    return _conn
+
+@functools.lru_cache(maxsize=128)
+def _cached_query(conn, sql, params, bucket):
+    """Run a query once per (connection, SQL, params, TTL bucket)"""
+    return conn.execute(sql, params).fetchall()
+
+def cached_fetchall(conn, sql, params=()):
+    """fetchall() for read-only report queries, cached for RESULT_CACHE_TTL seconds"""
+    return _cached_query(conn, sql, tuple(params), int(monotonic() // RESULT_CACHE_TTL))
+
+def invalidate_result_cache():
+    """Drop cached report results after the database has been modified"""
+    _cached_query.cache_clear()
+
+_CURRENCY_NONE = "$0.00"
+
+def format_currency(amount, _fmt="${:,.2f}".format):
+    """Format currency amount (Decimal values are formatted without a float round-trip)"""
+    return _CURRENCY_NONE if amount is None else _fmt(amount)
 
 def format_date(date_obj):
     """Format date object"""
-    if date_obj is None:
-        return "N/A"
+    # SQLite hands dates back as text, so check for str first
     if isinstance(date_obj, str):
         return date_obj
+    if date_obj is None:
+        return "N/A"
     return date_obj.strftime('%Y-%m-%d')
 
+def _iter_rows(cursor):
+    """Yield rows from a cursor in fetchmany batches of cursor.arraysize"""
+    while True:
+        batch = cursor.fetchmany()
+        if not batch:
+            return
+        yield from batch
+
 def display_table(data, headers, title=None):
     """Display data in a formatted table"""
     if title:
@@ -48,9 +174,21 @@ def display_table(data, headers, title=None):
         click.echo(f"{Fore.YELLOW}No data found.{Style.RESET_ALL}")
         return
     
-    table = tabulate(data, headers=headers, tablefmt="grid")
+    from tabulate import tabulate
+    table = tabulate(data, headers=headers, tablefmt=_table_format)
     click.echo(table)
 
+def bulk_insert(conn, sql, rows):
+    """Insert rows with a single executemany inside one transaction
+    
+    Entry point for import commands; returns the number of rows inserted.
+    """
+    with conn:
+        cursor = conn.executemany(sql, rows)
+    if cursor.rowcount > 0:
+        invalidate_result_cache()
+    return cursor.rowcount
+
 # ============================================================================
 # EMPLOYEE MANAGEMENT COMMANDS
 # ============================================================================
@@ -60,108 +198,125 @@ def employee():
     """Employee management commands"""
     pass
 
+_Q_LIST_EMPLOYEES_SELECT = """
+    SELECT 
+        e.EmployeeID,
+        e.FirstName,
+        e.LastName,
+        e.Email,
+        jt.JobTitleName,
+        d.DepartmentName,
+        e.Salary,
+        e.HireDate
+    FROM Employees e
+    JOIN JobTitles jt ON e.JobTitleID = jt.JobTitleID
+    JOIN Departments d ON e.DepartmentID = d.DepartmentID
+"""
+
+# Fixed statement text per filter variant so sqlite3's statement cache is hit
+_Q_LIST_EMPLOYEES_NO_DEPT = _Q_LIST_EMPLOYEES_SELECT + """
+    ORDER BY e.LastName, e.FirstName LIMIT ?
+"""
+
+_Q_LIST_EMPLOYEES_DEPT = _Q_LIST_EMPLOYEES_SELECT + """
+    WHERE d.DepartmentName LIKE ?
+    ORDER BY e.LastName, e.FirstName LIMIT ?
+"""
+
+_HEADERS_EMPLOYEES = ('ID', 'First Name', 'Last Name', 'Email', 'Job Title', 'Department', 'Salary', 'Hire Date')
+
 @employee.command('list')
 @click.option('--department', '-d', help='Filter by department name')
 @click.option('--limit', '-l', default=50, help='Limit number of results')
 def list_employees(department, limit):
     """List all employees with optional filters"""
-    conn = get_db_connection()
+    conn = get_db_connection(read_only=True)
     if not conn:
         return
     
-    query = """
-        SELECT 
-            e.EmployeeID,
-            e.FirstName,
-            e.LastName,
-            e.Email,
-            jt.JobTitleName,
-            d.DepartmentName,
-            e.Salary,
-            e.HireDate
-        FROM Employees e
-        JOIN JobTitles jt ON e.JobTitleID = jt.JobTitleID
-        JOIN Departments d ON e.DepartmentID = d.DepartmentID
-        WHERE 1=1
-    """
-    
-    params = []
-    if department:
-        query += " AND d.DepartmentName LIKE ?"
-        params.append(f"%{department}%")
-    
-    query += " ORDER BY e.LastName, e.FirstName LIMIT ?"
-    params.append(limit)
-    
-    cursor = conn.cursor()
-    cursor.execute(query, params)
-    employees = cursor.fetchall()
-    
-    headers = ['ID', 'First Name', 'Last Name', 'Email', 'Job Title', 'Department', 'Salary', 'Hire Date']
-    
-    # Format data
-    formatted_data = []
-    for emp in employees:
-        formatted_data.append([
-            emp[0],
-            emp[1],
-            emp[2],
-            emp[3],
-            emp[4],
-            emp[5],
-            format_currency(emp[6]),
-            format_date(emp[7])
-        ])
-    
-    display_table(formatted_data, headers, f"Employees ({len(employees)} found)")
-    conn.close()
+    with conn:
+        if department:
+            query = _Q_LIST_EMPLOYEES_DEPT
+            params = (f"%{department}%", limit)
+        else:
+            query = _Q_LIST_EMPLOYEES_NO_DEPT
+            params = (limit,)
+    
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        cursor.arraysize = FETCH_BATCH_SIZE
+        cursor.execute(query, params)
+    
+        # Format rows batch by batch straight off the cursor
+        formatted_data = [
+            [
+                emp['EmployeeID'],
+                emp['FirstName'],
+                emp['LastName'],
+                emp['Email'],
+                emp['JobTitleName'],
+                emp['DepartmentName'],
+                format_currency(emp['Salary']),
+                format_date(emp['HireDate'])
+            ]
+            for emp in _iter_rows(cursor)
+        ]
+    
+        display_table(formatted_data, _HEADERS_EMPLOYEES, f"Employees ({len(formatted_data)} found)")
 
 @employee.command('show')
 @click.argument('employee_id', type=int)
 def show_employee(employee_id):
     """Show detailed information about a specific employee"""
-    conn = get_db_connection()
+    conn = get_db_connection(read_only=True)
     if not conn:
         return
     
-    cursor = conn.cursor()
-    
-    # Get employee details
-    cursor.execute("""
-        SELECT 
-            e.*,
-            jt.JobTitleName,
-            d.DepartmentName,
-            m.FirstName || ' ' || m.LastName as ManagerName
-        FROM Employees e
-        JOIN JobTitles jt ON e.JobTitleID = jt.JobTitleID
-        JOIN Departments d ON e.DepartmentID = d.DepartmentID
-        LEFT JOIN Employees m ON e.ManagerID = m.EmployeeID
-        WHERE e.EmployeeID = ?
-    """, (employee_id,))
-    
-    emp = cursor.fetchone()
-    if not emp:
-        click.echo(f"{Fore.RED}❌ Employee with ID {employee_id} not found.{Style.RESET_ALL}")
-        conn.close()
-        return
+    with conn:
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
     
-    # Display employee details
-    click.echo(f"\n{Fore.CYAN}Employee Details{Style.RESET_ALL}")
-    click.echo("=" * 50)
-    click.echo(f"ID: {emp[0]}")
-    click.echo(f"Name: {emp[1]} {emp[2]}")
-    click.echo(f"Gender: {emp[3]}")
-    click.echo(f"Date of Birth: {format_date(emp[4])}")
-    click.echo(f"Email: {emp[5]}")
-    click.echo(f"Phone: {emp[6]}")
-    click.echo(f"Hire Date: {format_date(emp[7])}")
-    click.echo(f"Job Title: {emp[12]}")
-    click.echo(f"Department: {emp[13]}")
-    click.echo(f"Manager: {emp[14] or 'None'}")
-    click.echo(f"Salary: {format_currency(emp[11])}")
-    
-    conn.close()
+        # Get employee details
+        cursor.execute("""
+            SELECT 
+                e.EmployeeID,
+                e.FirstName,
+                e.LastName,
+                e.Gender,
+                e.DOB,
+                e.Email,
+                e.Phone,
+                e.HireDate,
+                e.Salary,
+                jt.JobTitleName,
+                d.DepartmentName,
+                m.FirstName || ' ' || m.LastName as ManagerName
+            FROM Employees e
+            JOIN JobTitles jt ON e.JobTitleID = jt.JobTitleID
+            JOIN Departments d ON e.DepartmentID = d.DepartmentID
+            LEFT JOIN Employees m ON e.ManagerID = m.EmployeeID
+            WHERE e.EmployeeID = ?
+        """, (employee_id,))
+    
+        emp = cursor.fetchone()
+        if not emp:
+            click.echo(f"{_ERR_PREFIX}Employee with ID {employee_id} not found.{Style.RESET_ALL}")
+            return
+    
+        # Display employee details
+        click.echo(f"\n{Fore.CYAN}Employee Details{Style.RESET_ALL}")
+        click.echo("=" * 50)
+        click.echo(f"ID: {emp['EmployeeID']}")
+        click.echo(f"Name: {emp['FirstName']} {emp['LastName']}")
+        click.echo(f"Gender: {emp['Gender']}")
+        click.echo(f"Date of Birth: {format_date(emp['DOB'])}")
+        click.echo(f"Email: {emp['Email']}")
+        click.echo(f"Phone: {emp['Phone']}")
+        click.echo(f"Hire Date: {format_date(emp['HireDate'])}")
+        click.echo(f"Job Title: {emp['JobTitleName']}")
+        click.echo(f"Department: {emp['DepartmentName']}")
+        click.echo(f"Manager: {emp['ManagerName'] or 'None'}")
+        click.echo(f"Salary: {format_currency(emp['Salary'])}")
 
 # ============================================================================
 # DEPARTMENT MANAGEMENT COMMANDS
@@ -172,33 +327,35 @@ def department():
     """Department management commands"""
     pass
 
+_HEADERS_DEPARTMENTS = ('ID', 'Name', 'Location', 'Head', 'Employee Count')
+
 @department.command('list')
 def list_departments():
     """List all departments"""
-    conn = get_db_connection()
+    conn = get_db_connection(read_only=True)
     if not conn:
         return
     
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT 
-            d.DepartmentID,
-            d.DepartmentName,
-            d.Location,
-            e.FirstName || ' ' || e.LastName as HeadName,
-            COUNT(emp.EmployeeID) as EmployeeCount
-        FROM Departments d
-        LEFT JOIN Employees e ON d.HeadID = e.EmployeeID
-        LEFT JOIN Employees emp ON d.DepartmentID = emp.DepartmentID
-        GROUP BY d.DepartmentID, d.DepartmentName, d.Location, e.FirstName, e.LastName
-        ORDER BY d.DepartmentName
-    """)
+    with conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT 
+                d.DepartmentID,
+                d.DepartmentName,
+                d.Location,
+                (SELECT h.FirstName || ' ' || h.LastName
+                 FROM Employees h
+                 WHERE h.EmployeeID = d.HeadID) as HeadName,
+                (SELECT COUNT(*)
+                 FROM Employees emp
+                 WHERE emp.DepartmentID = d.DepartmentID) as EmployeeCount
+            FROM Departments d
+            ORDER BY d.DepartmentName
+        """)
     
-    departments = cursor.fetchall()
-    headers = ['ID', 'Name', 'Location', 'Head', 'Employee Count']
+        departments = cursor.fetchall()
     
-    display_table(departments, headers, f"Departments ({len(departments)} found)")
-    conn.close()
+        display_table(departments, _HEADERS_DEPARTMENTS, f"Departments ({len(departments)} found)")
 
 # ============================================================================
 # PROJECT MANAGEMENT COMMANDS
@@ -209,48 +366,52 @@ def project():
     """Project management commands"""
     pass
 
+_HEADERS_PROJECTS = ('ID', 'Name', 'Department', 'Start Date', 'End Date', 'Budget', 'Team Size')
+
 @project.command('list')
 def list_projects():
     """List all projects"""
-    conn = get_db_connection()
+    conn = get_db_connection(read_only=True)
     if not conn:
         return
     
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT 
-            p.ProjectID,
-            p.ProjectName,
-            d.DepartmentName,
-            p.StartDate,
-            p.EndDate,
-            p.Budget,
-            COUNT(ep.EmployeeID) as TeamSize
-        FROM Projects p
-        JOIN Departments d ON p.DepartmentID = d.DepartmentID
-        LEFT JOIN EmployeeProjects ep ON p.ProjectID = ep.ProjectID
-        GROUP BY p.ProjectID, p.ProjectName, d.DepartmentName, p.StartDate, p.EndDate, p.Budget
-        ORDER BY p.StartDate
-    """)
-    
-    projects = cursor.fetchall()
-    headers = ['ID', 'Name', 'Department', 'Start Date', 'End Date', 'Budget', 'Team Size']
-    
-    # Format data
-    formatted_data = []
-    for proj in projects:
-        formatted_data.append([
-            proj[0],
-            proj[1],
-            proj[2],
-            format_date(proj[3]),
-            format_date(proj[4]),
-            format_currency(proj[5]),
-            proj[6]
-        ])
-    
-    display_table(formatted_data, headers, f"Projects ({len(projects)} found)")
-    conn.close()
+    with conn:
+        cursor = conn.cursor()
+        cursor.arraysize = FETCH_BATCH_SIZE
+        cursor.execute("""
+            SELECT 
+                p.ProjectID,
+                p.ProjectName,
+                d.DepartmentName,
+                p.StartDate,
+                p.EndDate,
+                p.Budget,
+                COALESCE(ts.TeamSize, 0) as TeamSize
+            FROM Projects p
+            JOIN Departments d ON p.DepartmentID = d.DepartmentID
+            LEFT JOIN (
+                SELECT ProjectID, COUNT(*) as TeamSize
+                FROM EmployeeProjects
+                GROUP BY ProjectID
+            ) ts ON p.ProjectID = ts.ProjectID
+            ORDER BY p.StartDate
+        """)
+    
+        # Format rows batch by batch instead of materializing the raw result first
+        formatted_data = [
+            [
+                proj[0],
+                proj[1],
+                proj[2],
+                format_date(proj[3]),
+                format_date(proj[4]),
+                format_currency(proj[5]),
+                proj[6]
+            ]
+            for proj in _iter_rows(cursor)
+        ]
+    
+        display_table(formatted_data, _HEADERS_PROJECTS, f"Projects ({len(formatted_data)} found)")
 
 # ============================================================================
 # QUERY COMMANDS
@@ -261,58 +422,47 @@ def query():
     """Business intelligence and reporting queries"""
     pass
 
+_HEADERS_TOP_SALARIES = ('Department', 'First Name', 'Last Name', 'Salary', 'Rank')
+
 @query.command('top-salaries')
-@click.option('--limit', '-l', default=3, help='Number of top employees per department')
+@click.option('--limit', '-l', default=3, type=click.IntRange(min=0), help='Number of top employees per department')
 def top_salaries_by_department(limit):
     """Find top N highest-paid employees per department"""
     conn = get_db_connection()
     if not conn:
         return
     
-    cursor = conn.cursor()
-    
-    query = f"""
-        WITH RankedEmployees AS (
-            SELECT 
-                e.EmployeeID,
-                e.FirstName,
-                e.LastName,
-                e.Salary,
-                d.DepartmentID,
-                d.DepartmentName,
-                ROW_NUMBER() OVER (PARTITION BY d.DepartmentID ORDER BY e.Salary DESC) as SalaryRank
-            FROM Employees e
-            JOIN Departments d ON e.DepartmentID = d.DepartmentID
-        )
+    # Top-N lookup per department (served by the DepartmentID, Salary index)
+    # instead of ranking the whole Employees table with ROW_NUMBER()
+    query = """
         SELECT 
-            DepartmentName,
-            FirstName,
-            LastName,
-            Salary,
-            SalaryRank
-        FROM RankedEmployees
-        WHERE SalaryRank <= {limit}
-        ORDER BY DepartmentName, SalaryRank
+            d.DepartmentName,
+            e.FirstName,
+            e.LastName,
+            fmt_money(e.Salary) AS Salary
+        FROM Departments d
+        JOIN Employees e ON e.EmployeeID IN (
+            SELECT t.EmployeeID
+            FROM Employees t
+            WHERE t.DepartmentID = d.DepartmentID
+            ORDER BY t.Salary DESC, t.EmployeeID
+            LIMIT ?
+        )
+        ORDER BY d.DepartmentName, e.Salary DESC, e.EmployeeID
     """
     
-    cursor.execute(query)
-    results = cursor.fetchall()
+    results = cached_fetchall(conn, query, (limit,))
     
-    headers = ['Department', 'First Name', 'Last Name', 'Salary', 'Rank']
+    # Salaries come back formatted; number each department's rows to get the rank
+    formatted_data = [
+        (*row, rank)
+        for _, rows in groupby(results, key=itemgetter(0))
+        for rank, row in enumerate(rows, 1)
+    ]
     
-    # Format data
-    formatted_data = []
-    for row in results:
-        formatted_data.append([
-            row[0],
-            row[1],
-            row[2],
-            format_currency(row[3]),
-            row[4]
-        ])
-    
-    display_table(formatted_data, headers, f"Top {limit} Salaries by Department")
-    conn.close()
+    display_table(formatted_data, _HEADERS_TOP_SALARIES, f"Top {limit} Salaries by Department")
+
+_HEADERS_MULTI_PROJECTS = ('ID', 'Name', 'Email', 'Project Count', 'Projects')
 
 @query.command('multi-projects')
 @click.option('--min-projects', '-m', default=2, help='Minimum number of projects')
@@ -322,42 +472,35 @@ def employees_multiple_projects(min_projects):
     if not conn:
         return
     
-    cursor = conn.cursor()
-    
+    # Names are joined and project lists truncated in SQL, so rows display as-is
     query = """
         SELECT 
-            e.EmployeeID,
-            e.FirstName,
-            e.LastName,
-            e.Email,
-            COUNT(ep.ProjectID) as ProjectCount,
-            GROUP_CONCAT(p.ProjectName, ', ') as Projects
-        FROM Employees e
-        JOIN EmployeeProjects ep ON e.EmployeeID = ep.EmployeeID
-        JOIN Projects p ON ep.ProjectID = p.ProjectID
-        GROUP BY e.EmployeeID, e.FirstName, e.LastName, e.Email
-        HAVING COUNT(ep.ProjectID) > ?
-        ORDER BY ProjectCount DESC
+            EmployeeID,
+            Name,
+            Email,
+            ProjectCount,
+            CASE WHEN length(Projects) > 50 THEN substr(Projects, 1, 50) || '...' ELSE Projects END
+        FROM (
+            SELECT 
+                e.EmployeeID,
+                e.FirstName || ' ' || e.LastName as Name,
+                e.Email,
+                COUNT(ep.ProjectID) as ProjectCount,
+                GROUP_CONCAT(p.ProjectName, ', ') as Projects
+            FROM Employees e
+            JOIN EmployeeProjects ep ON e.EmployeeID = ep.EmployeeID
+            JOIN Projects p ON ep.ProjectID = p.ProjectID
+            GROUP BY e.EmployeeID, e.FirstName, e.LastName, e.Email
+            HAVING COUNT(ep.ProjectID) > ?
+        )
+        ORDER BY ProjectCount DESC, EmployeeID
     """
     
-    cursor.execute(query, (min_projects,))
-    results = cursor.fetchall()
-    
-    headers = ['ID', 'Name', 'Email', 'Project Count', 'Projects']
-    
-    # Format data
-    formatted_data = []
-    for row in results:
-        formatted_data.append([
-            row[0],
-            f"{row[1]} {row[2]}",
-            row[3],
-            row[4],
-            row[5][:50] + "..." if len(row[5]) > 50 else row[5]
-        ])
+    results = cached_fetchall(conn, query, (min_projects,))
     
-    display_table(formatted_data, headers, f"Employees with >{min_projects} Projects")
-    conn.close()
+    display_table(results, _HEADERS_MULTI_PROJECTS, f"Employees with >{min_projects} Projects")
+
+_HEADERS_ATTENDANCE = ('Department', 'Absent', 'Present', 'On Leave', 'WFH', 'Total Days', 'Absenteeism %')
 
 @query.command('attendance-report')
 @click.option('--month', '-m', default=datetime.now().month, help='Month (1-12)')
@@ -368,32 +511,32 @@ def monthly_attendance_report(month, year):
     if not conn:
         return
     
-    cursor = conn.cursor()
-    
+    # IS yields 0/1 even for a NULL Status, so each SUM is a plain count
     query = """
         SELECT 
             d.DepartmentName,
-            COUNT(CASE WHEN a.Status = 'Absent' THEN 1 END) as AbsentCount,
-            COUNT(CASE WHEN a.Status = 'Present' THEN 1 END) as PresentCount,
-            COUNT(CASE WHEN a.Status = 'OnLeave' THEN 1 END) as OnLeaveCount,
-            COUNT(CASE WHEN a.Status = 'WFH' THEN 1 END) as WFHCount,
+            SUM(a.Status IS 'Absent') as AbsentCount,
+            SUM(a.Status IS 'Present') as PresentCount,
+            SUM(a.Status IS 'OnLeave') as OnLeaveCount,
+            SUM(a.Status IS 'WFH') as WFHCount,
             COUNT(*) as TotalDays,
-            ROUND(COUNT(CASE WHEN a.Status = 'Absent' THEN 1 END) * 100.0 / COUNT(*), 2) as AbsenteeismRate
+            ROUND(SUM(a.Status IS 'Absent') * 100.0 / COUNT(*), 2) as AbsenteeismRate
         FROM Attendance a
         JOIN Employees e ON a.EmployeeID = e.EmployeeID
         JOIN Departments d ON e.DepartmentID = d.DepartmentID
-        WHERE strftime('%m', a.Date) = ? AND strftime('%Y', a.Date) = ?
+        WHERE a.Date >= ? AND a.Date < ?
         GROUP BY d.DepartmentID, d.DepartmentName
         ORDER BY AbsenteeismRate DESC
     """
     
-    cursor.execute(query, (f"{month:02d}", str(year)))
-    results = cursor.fetchall()
+    # Plain range on the ISO date text so idx_attendance_date covers the scan
+    start = f"{year}-{month:02d}-01"
+    end = f"{year + 1}-01-01" if month == 12 else f"{year}-{month + 1:02d}-01"
+    results = cached_fetchall(conn, query, (start, end))
     
-    headers = ['Department', 'Absent', 'Present', 'On Leave', 'WFH', 'Total Days', 'Absenteeism %']
-    
-    display_table(results, headers, f"Monthly Attendance Report - {month}/{year}")
-    conn.close()
+    display_table(results, _HEADERS_ATTENDANCE, f"Monthly Attendance Report - {month}/{year}")
+
+_HEADERS_PAYROLL = ('Department', 'Employees', 'Basic Salary', 'Allowances', 'Deductions', 'Net Salary', 'Avg Net Salary')
 
 @query.command('payroll-cost')
 @click.option('--year', '-y', default=datetime.now().year, help='Year')
@@ -403,57 +546,39 @@ def payroll_cost_by_department(year):
     if not conn:
         return
     
-    cursor = conn.cursor()
-    
     query = """
         SELECT 
             d.DepartmentName,
             COUNT(DISTINCT p.EmployeeID) as EmployeeCount,
-            SUM(p.BasicSalary) as TotalBasicSalary,
-            SUM(p.Allowances) as TotalAllowances,
-            SUM(p.Deductions) as TotalDeductions,
-            SUM(p.NetSalary) as TotalNetSalary,
-            ROUND(AVG(p.NetSalary), 2) as AverageNetSalary
+            fmt_money(SUM(p.BasicSalary)) as TotalBasicSalary,
+            fmt_money(SUM(p.Allowances)) as TotalAllowances,
+            fmt_money(SUM(p.Deductions)) as TotalDeductions,
+            fmt_money(SUM(p.NetSalary)) as TotalNetSalary,
+            fmt_money(ROUND(AVG(p.NetSalary), 2)) as AverageNetSalary
         FROM Payroll p
         JOIN Employees e ON p.EmployeeID = e.EmployeeID
         JOIN Departments d ON e.DepartmentID = d.DepartmentID
         WHERE p.Year = ?
         GROUP BY d.DepartmentID, d.DepartmentName
-        ORDER BY TotalNetSalary DESC
+        ORDER BY SUM(p.NetSalary) DESC
     """
     
-    cursor.execute(query, (year,))
-    results = cursor.fetchall()
-    
-    headers = ['Department', 'Employees', 'Basic Salary', 'Allowances', 'Deductions', 'Net Salary', 'Avg Net Salary']
+    results = cached_fetchall(conn, query, (year,))
     
-    # Format data
-    formatted_data = []
-    for row in results:
-        formatted_data.append([
-            row[0],
-            row[1],
-            format_currency(row[2]),
-            format_currency(row[3]),
-            format_currency(row[4]),
-            format_currency(row[5]),
-            format_currency(row[6])
-        ])
-    
-    display_table(formatted_data, headers, f"Payroll Cost by Department - {year}")
-    conn.close()
+    display_table(results, _HEADERS_PAYROLL, f"Payroll Cost by Department - {year}")
 
 @query.command('run-all')
 @click.option('--output-file', '-o', help='Save results to file')
 @click.option('--verbose', '-v', is_flag=True, help='Show detailed output')
 def run_all_queries(output_file, verbose):
     """Execute all queries from queries.sql file"""
+    from tabulate import tabulate
     conn = get_db_connection()
     if not conn:
         return
     
     if not os.path.exists('queries.sql'):
-        click.echo(f"{Fore.RED}❌ queries.sql file not found!{Style.RESET_ALL}")
+        click.echo(f"{_ERR_PREFIX}queries.sql file not found!{Style.RESET_ALL}")
         return
     
     click.echo(f"{Fore.CYAN}🚀 Executing All Queries from queries.sql{Style.RESET_ALL}")
@@ -464,40 +589,11 @@ def run_all_queries(output_file, verbose):
         with open('queries.sql', 'r') as f:
             content = f.read()
     except Exception as e:
-        click.echo(f"{Fore.RED}❌ Error reading queries.sql: {e}{Style.RESET_ALL}")
+        click.echo(f"{_ERR_PREFIX}Error reading queries.sql: {e}{Style.RESET_ALL}")
         return
     
-    # Split content into individual queries
-    queries = []
-    current_query = ""
-    in_comment = False
-    
-    for line in content.split('\n'):
-        line = line.strip()
-        
-        # Skip empty lines and comments
-        if not line or line.startswith('--'):
-            continue
-            
-        # Check for multi-line comments
-        if line.startswith('/*'):
-            in_comment = True
-            continue
-        if line.endswith('*/'):
-            in_comment = False
-            continue
-        if in_comment:
-            continue
-            
-        current_query += line + " "
-        
-        # If line ends with semicolon, it's a complete query
-        if line.endswith(';'):
-            queries.append(current_query.strip())
-            current_query = ""
-    
-    if current_query.strip():  # Add any remaining query
-        queries.append(current_query.strip())
+    # Split content into individual queries using SQLite's own tokenizer
+    queries = split_sql_statements(content)
     
     click.echo(f"📊 Found {len(queries)} queries to execute")
     click.echo()
@@ -510,79 +606,84 @@ def run_all_queries(output_file, verbose):
         if not query.strip():
             continue
             
+        # Collect this query's report and write it with a single echo
+        lines = []
+        preview = " ".join(line.strip() for line in query.splitlines())
+        summary = preview[:100] + '...' if len(preview) > 100 else preview
+        
         try:
-            click.echo(f"{Fore.YELLOW}Query {i}:{Style.RESET_ALL}")
+            lines.append(f"{_QUERY_PREFIX}{i}:{Style.RESET_ALL}")
             if verbose:
-                click.echo(f"   {query[:100]}{'...' if len(query) > 100 else ''}")
+                lines.append(f"   {preview[:100]}{'...' if len(preview) > 100 else ''}")
             
             # Execute query
             cursor.execute(query)
             
-            # Try to fetch results
+            # Try to fetch results, keeping only a short preview in memory
             try:
-                results = cursor.fetchall()
-                if results:
+                preview_rows = cursor.fetchmany(5)
+                if preview_rows:
+                    row_count = len(preview_rows) + sum(1 for _ in cursor)
                     # Get column names
                     column_names = [description[0] for description in cursor.description]
                     
                     if verbose:
-                        click.echo(f"   ✅ Results: {len(results)} rows")
+                        lines.append(f"   ✅ Results: {row_count} rows")
                         # Show first few rows
-                        if len(results) <= 5:
-                            table = tabulate(results, headers=column_names, tablefmt="grid")
-                            click.echo(f"   {table}")
-                        else:
-                            table = tabulate(results[:3], headers=column_names, tablefmt="grid")
-                            click.echo(f"   {table}")
-                            click.echo(f"   ... and {len(results) - 3} more rows")
+                        shown = preview_rows if row_count <= 5 else preview_rows[:3]
+                        table = tabulate(shown, headers=column_names, tablefmt=_table_format)
+                        lines.append(f"   {table}")
+                        if row_count > 5:
+                            lines.append(f"   ... and {row_count - 3} more rows")
                     else:
-                        click.echo(f"   ✅ {len(results)} rows returned")
+                        lines.append(f"   ✅ {row_count} rows returned")
                     
                     all_results.append({
                         'query_num': i,
-                        'query': query[:100] + '...' if len(query) > 100 else query,
-                        'rows': len(results),
+                        'query': summary,
+                        'rows': row_count,
                         'columns': column_names
                     })
                 else:
-                    click.echo(f"   ✅ Query executed successfully (no results)")
+                    lines.append(f"   ✅ Query executed successfully (no results)")
                     all_results.append({
                         'query_num': i,
-                        'query': query[:100] + '...' if len(query) > 100 else query,
+                        'query': summary,
                         'rows': 0,
                         'columns': []
                     })
                     
             except sqlite3.OperationalError:
                 # Query executed but no results to fetch (e.g., INSERT, UPDATE, DELETE)
-                click.echo(f"   ✅ Query executed successfully")
+                lines.append(f"   ✅ Query executed successfully")
                 all_results.append({
                     'query_num': i,
-                    'query': query[:100] + '...' if len(query) > 100 else query,
+                    'query': summary,
                     'rows': 'N/A',
                     'columns': []
                 })
                 
         except sqlite3.OperationalError as e:
-            click.echo(f"   ❌ Error: {e}")
+            lines.append(f"   ❌ Error: {e}")
             all_results.append({
                 'query_num': i,
-                'query': query[:100] + '...' if len(query) > 100 else query,
+                'query': summary,
                 'rows': 'ERROR',
                 'columns': [],
                 'error': str(e)
             })
         except Exception as e:
-            click.echo(f"   ❌ Unexpected error: {e}")
+            lines.append(f"   ❌ Unexpected error: {e}")
             all_results.append({
                 'query_num': i,
-                'query': query[:100] + '...' if len(query) > 100 else query,
+                'query': summary,
                 'rows': 'ERROR',
                 'columns': [],
                 'error': str(e)
             })
         
-        click.echo()
+        lines.append("")
+        click.echo("\n".join(lines))
     
     # Summary
     click.echo(f"{Fore.GREEN}📋 Execution Summary:{Style.RESET_ALL}")
@@ -616,9 +717,9 @@ def run_all_queries(output_file, verbose):
             
             click.echo(f"\n💾 Results saved to: {output_file}")
         except Exception as e:
-            click.echo(f"{Fore.RED}❌ Error saving results: {e}{Style.RESET_ALL}")
-    
-    conn.close()
+            click.echo(f"{_ERR_PREFIX}Error saving results: {e}{Style.RESET_ALL}")
+
+_HEADERS_DASHBOARD = ('Metric', 'Value', 'Detail')
 
 @query.command('dashboard')
 def dashboard():
@@ -627,59 +728,36 @@ def dashboard():
     if not conn:
         return
     
-    cursor = conn.cursor()
+    # Get key metrics in a single round-trip; today is bound as a parameter so the
+    # date predicates are plain comparisons against idx_projects_start_date
+    today = date.today().isoformat()
+    query = """
+        SELECT
+            (SELECT COUNT(*) FROM Employees),
+            (SELECT COUNT(*) FROM Departments),
+            (SELECT COUNT(*) FROM Projects
+             WHERE StartDate <= ? AND EndDate >= ?),
+            (SELECT ROUND(AVG(Salary), 2) FROM Employees),
+            (SELECT ROUND(SUM(NetSalary), 2) FROM Payroll
+             WHERE Year = 2024 AND Month IN (1, 2, 3)),
+            (SELECT ROUND(AVG(Rating), 2) FROM PerformanceReviews
+             WHERE ReviewDate >= date(?, '-1 year')),
+            (SELECT COUNT(*) FROM LeaveRequests WHERE Status = 'Pending')
+    """
+    (emp_count, dept_count, active_projects, avg_salary,
+     q1_payroll, avg_rating, pending_leaves) = cached_fetchall(conn, query, (today, today, today))[0]
     
-    # Get key metrics
-    metrics = []
-    
-    # Total employees
-    cursor.execute("SELECT COUNT(*) FROM Employees")
-    emp_count = cursor.fetchone()[0]
-    metrics.append(['Total Employees', emp_count, ''])
-    
-    # Total departments
-    cursor.execute("SELECT COUNT(*) FROM Departments")
-    dept_count = cursor.fetchone()[0]
-    metrics.append(['Total Departments', dept_count, ''])
-    
-    # Active projects
-    cursor.execute("""
-        SELECT COUNT(*) FROM Projects 
-        WHERE date('now') BETWEEN StartDate AND EndDate
-    """)
-    active_projects = cursor.fetchone()[0]
-    metrics.append(['Active Projects', active_projects, ''])
-    
-    # Average salary
-    cursor.execute("SELECT ROUND(AVG(Salary), 2) FROM Employees")
-    avg_salary = cursor.fetchone()[0]
-    metrics.append(['Average Salary', format_currency(avg_salary), ''])
-    
-    # Total payroll cost Q1 2024
-    cursor.execute("""
-        SELECT ROUND(SUM(NetSalary), 2) FROM Payroll 
-        WHERE Year = 2024 AND Month IN (1, 2, 3)
-    """)
-    q1_payroll = cursor.fetchone()[0] or 0
-    metrics.append(['Q1 2024 Payroll Cost', format_currency(q1_payroll), ''])
-    
-    # Average performance rating
-    cursor.execute("""
-        SELECT ROUND(AVG(Rating), 2) FROM PerformanceReviews 
-        WHERE ReviewDate >= date('now', '-1 year')
-    """)
-    avg_rating = cursor.fetchone()[0] or 0
-    metrics.append(['Average Performance Rating', avg_rating, ''])
-    
-    # Pending leave requests
-    cursor.execute("SELECT COUNT(*) FROM LeaveRequests WHERE Status = 'Pending'")
-    pending_leaves = cursor.fetchone()[0]
-    metrics.append(['Pending Leave Requests', pending_leaves, ''])
-    
-    headers = ['Metric', 'Value', 'Detail']
-    display_table(metrics, headers, "System Dashboard")
-    
-    conn.close()
+    metrics = [
+        ['Total Employees', emp_count, ''],
+        ['Total Departments', dept_count, ''],
+        ['Active Projects', active_projects, ''],
+        ['Average Salary', format_currency(avg_salary), ''],
+        ['Q1 2024 Payroll Cost', format_currency(q1_payroll or 0), ''],
+        ['Average Performance Rating', avg_rating or 0, ''],
+        ['Pending Leave Requests', pending_leaves, ''],
+    ]
+    
+    display_table(metrics, _HEADERS_DASHBOARD, "System Dashboard")
 
 # ============================================================================
 # MAIN CLI GROUP
@@ -687,7 +765,9 @@ def dashboard():
 
 @click.group()
 @click.version_option(version='1.0.0')
-def cli():
+@click.option('--format', 'table_format', type=click.Choice(TABLE_FORMATS), default='grid',
+              help='Table output format (plain and tsv render fastest for large listings)')
+def cli(table_format):
     """HR Database Management System - CLI Interface
     
     A comprehensive command-line interface for managing HR data,
@@ -695,7 +775,8 @@ def cli():
     
     Use --help with any command to see detailed options.
     """
-    pass
+    global _table_format
+    _table_format = table_format
 
 # Add all command groups to main CLI
 cli.add_command(employee)
@@ -721,24 +802,28 @@ def system_status():
         
         # Check database content
         conn = get_db_connection()
+        counts = {}
         if conn:
             cursor = conn.cursor()
             
             # Count records in each table
-            tables = ['JobTitles', 'Departments', 'Employees', 'Projects', 
-                     'EmployeeProjects', 'Attendance', 'LeaveRequests', 
-                     'PerformanceReviews', 'Payroll']
-            
-            click.echo(f"\n📊 Database Contents:")
-            for table in tables:
-                try:
-                    cursor.execute(f"SELECT COUNT(*) FROM {table}")
-                    count = cursor.fetchone()[0]
-                    click.echo(f"   {table}: {count:,} records")
-                except:
-                    click.echo(f"   {table}: Error")
-            
-            conn.close()
+            try:
+                counts = count_records(cursor)
+            except sqlite3.DatabaseError:
+                # One bad table fails the whole UNION ALL; count them one by one instead
+                for table in TABLES:
+                    try:
+                        counts[table] = cursor.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                    except sqlite3.DatabaseError:
+                        pass
+        
+        # An unreadable file still gets the table list, with every count as Error
+        click.echo(f"\n📊 Database Contents:")
+        for table in TABLES:
+            if table in counts:
+                click.echo(f"   {table}: {counts[table]:,} records")
+            else:
+                click.echo(f"   {table}: Error")
     else:
         click.echo(f"❌ Database: {DB_FILE} not found")
         click.echo("   Run 'python init_db.py' to initialize the database")
@@ -754,25 +839,111 @@ def system_status():
     click.echo("   query attendance-report - Monthly attendance report")
     click.echo("   query payroll-cost - Payroll cost by department")
     click.echo("   query run-all     - Execute all queries from queries.sql")
+    click.echo("   doctor           - Check ORM reads for lazy-load regressions")
 
 @cli.command('init')
 def initialize_system():
     """Initialize the database system"""
     click.echo(f"{Fore.YELLOW}Initializing HR Database Management System...{Style.RESET_ALL}")
     
-    if os.path.exists('init_db.py'):
-        import subprocess
-        try:
-            result = subprocess.run(['python', 'init_db.py'], capture_output=True, text=True)
-            if result.returncode == 0:
-                click.echo(f"{Fore.GREEN}✅ System initialized successfully!{Style.RESET_ALL}")
+    # init_database() replaces the database file, so drop the shared connection first
+    _close_db_connection()
+    invalidate_result_cache()
+    
+    output = io.StringIO()
+    try:
+        with redirect_stdout(output):
+            ok = init_database() and verify_database()
+            if ok:
+                run_sample_queries()
+        if ok:
+            click.echo(f"{_OK_PREFIX}System initialized successfully!{Style.RESET_ALL}")
+        else:
+            click.echo(f"{_ERR_PREFIX}Initialization failed:{Style.RESET_ALL}")
+            click.echo(output.getvalue())
+    except Exception as e:
+        click.echo(f"{_ERR_PREFIX}Error running init script: {e}{Style.RESET_ALL}")
+
+@cli.command('doctor')
+def doctor():
+    """Check representative ORM reads for accidental lazy loads (run with HR_STRICT_LOADING=1)"""
+    click.echo(f"{Fore.CYAN}HR Database Management System - ORM Doctor{Style.RESET_ALL}")
+    click.echo("=" * 50)
+    
+    if not os.path.exists(DB_FILE):
+        click.echo(f"{_ERR_PREFIX}Database not found! Please run 'python init_db.py' first.{Style.RESET_ALL}")
+        raise SystemExit(1)
+    
+    from sqlalchemy import select
+    from sqlalchemy.orm import joinedload, selectinload
+    from app import app, db, count_queries, STRICT_LOADING, Employees, Departments, Projects, EmployeeProjects
+    
+    # Without strict loading a stray lazy load is just one more query, not a failure
+    if not STRICT_LOADING:
+        click.echo(f"{_ERR_PREFIX}Strict loading is off! Run 'HR_STRICT_LOADING=1 python hr_cli.py doctor'.{Style.RESET_ALL}")
+        raise SystemExit(1)
+    
+    def _touch(*attrs):
+        # Arguments are evaluated by the caller, which is what triggers any lazy load
+        pass
+    
+    def read_employees():
+        stmt = select(Employees).options(
+            selectinload(Employees.attendance_records),
+            selectinload(Employees.payroll_records),
+        )
+        for emp in db.session.scalars(stmt).unique():
+            _touch(emp.department.DepartmentName, emp.job_title, emp.manager,
+                   emp.employee_projects, emp.attendance_records, emp.payroll_records)
+    
+    def read_departments():
+        stmt = select(Departments).options(
+            selectinload(Departments.employees).raiseload(Employees.employee_projects),
+            selectinload(Departments.projects),
+        )
+        for dept in db.session.scalars(stmt):
+            _touch(dept.employees, dept.projects)
+    
+    def read_projects():
+        stmt = select(Projects).options(
+            joinedload(Projects.department),
+            selectinload(Projects.employee_projects).joinedload(EmployeeProjects.employee),
+        )
+        for proj in db.session.scalars(stmt).unique():
+            _touch(proj.department.DepartmentName)
+            for ep in proj.employee_projects:
+                _touch(ep.employee.FirstName)
+    
+    # (description, read, maximum number of queries): one base SELECT plus one per
+    # selectin loader the read asks for; joined loaders ride along in the base SELECT
+    checks = [
+        # + employee_projects (mapper selectin), attendance_records, payroll_records
+        ('Employees with department, title, manager and records', read_employees, 1 + 3),
+        # + employees, projects
+        ('Departments with employees and projects', read_departments, 1 + 2),
+        # + employee_projects (employee joined into it)
+        ('Projects with department and team', read_projects, 1 + 1),
+    ]
+    
+    failed = 0
+    with app.app_context():
+        for description, read, max_queries in checks:
+            db.session.expunge_all()
+            try:
+                with count_queries() as counter:
+                    read()
+            except Exception as e:
+                click.echo(f"❌ {description}: {e}")
+                failed += 1
+                continue
+            if counter['count'] <= max_queries:
+                click.echo(f"✅ {description}: {counter['count']} queries (max {max_queries})")
             else:
-                click.echo(f"{Fore.RED}❌ Initialization failed:{Style.RESET_ALL}")
-                click.echo(result.stderr)
-        except Exception as e:
-            click.echo(f"{Fore.RED}❌ Error running init script: {e}{Style.RESET_ALL}")
-    else:
-        click.echo(f"{Fore.RED}❌ init_db.py not found!{Style.RESET_ALL}")
+                click.echo(f"❌ {description}: {counter['count']} queries (max {max_queries})")
+                failed += 1
+    
+    if failed:
+        raise SystemExit(1)
 
 if __name__ == '__main__':
     cli()
@@ -8,31 +8,130 @@ import sqlite3
 import os
 from datetime import datetime, date, time
 
+TABLES = [
+    'JobTitles', 'Departments', 'Employees', 'Projects', 
+    'EmployeeProjects', 'Attendance', 'LeaveRequests', 
+    'PerformanceReviews', 'Payroll'
+]
+
+def count_records(cursor, tables=TABLES, use_stats=False):
+    """Count rows in every existing table with a single UNION ALL query
+
+    With use_stats, row counts recorded by ANALYZE in sqlite_stat1 are used
+    instead, and only tables without statistics are counted.
+    """
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+    existing = {row[0] for row in cursor}
+    present = [table for table in tables if table in existing]
+    counts = {}
+    if use_stats and 'sqlite_stat1' in existing:
+        # The first number of each stat entry is the table's row count
+        cursor.execute("SELECT tbl, stat FROM sqlite_stat1")
+        for table, stat in cursor:
+            if table in present:
+                counts[table] = max(counts.get(table, 0), int(stat.split()[0]))
+    missing = [table for table in present if table not in counts]
+    if missing:
+        # Table names come from the hard-coded list above, never from user input
+        cursor.execute(" UNION ALL ".join(f"SELECT '{table}', COUNT(*) FROM {table}" for table in missing))
+        counts.update(cursor)
+    return counts
+
+# Bulk-load settings: no rollback journal or fsync while the fresh file is filled
+BULK_LOAD_PRAGMAS = """
+    PRAGMA journal_mode=OFF;
+    PRAGMA synchronous=OFF;
+    PRAGMA locking_mode=EXCLUSIVE;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA cache_size=-262144;
+"""
+
+def split_sql_statements(script):
+    """Split a SQL script into statements using SQLite's own tokenizer"""
+    statements = []
+    current = ""
+    
+    for line in script.splitlines(keepends=True):
+        # Skip empty lines and comments
+        if not line.strip() or line.lstrip().startswith('--'):
+            continue
+        
+        current += line
+        
+        # Only a line containing ';' can finish a statement, so skip the rescan otherwise;
+        # complete_statement ignores semicolons inside strings, comments and triggers
+        if ';' in line and sqlite3.complete_statement(current):
+            statements.append(current.strip())
+            current = ""
+    
+    if current.strip():  # Add any remaining statement
+        statements.append(current.strip())
+    
+    return statements
+
+def remove_database(path='hr_database.db'):
+    """Delete a database file with its -wal/-shm files; False if it is still in use"""
+    if os.path.exists(path):
+        try:
+            conn = sqlite3.connect(path, timeout=0)
+            try:
+                # Leaving WAL mode needs sole access, so this fails while anyone has it open
+                conn.execute("PRAGMA journal_mode=DELETE")
+            finally:
+                conn.close()
+        except sqlite3.OperationalError:
+            return False
+        except sqlite3.DatabaseError:
+            pass  # Not a database at all, nothing can be attached to it
+    
+    # A new file must never be paired with the old file's WAL and shared memory
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    return True
+
 def init_database():
     """Initialize the database with schema and sample data"""
     
     # Remove existing database if it exists
     if os.path.exists('hr_database.db'):
-        os.remove('hr_database.db')
+        if not remove_database('hr_database.db'):
+            print("❌ Error: hr_database.db is in use by another process (CLI or app.py); close it and retry.")
+            return False
         print("Removed existing database.")
+    else:
+        remove_database('hr_database.db')  # Drop stray -wal/-shm files
     
-    # Create new database connection
-    conn = sqlite3.connect('hr_database.db')
+    # Build in a scratch file so the WAL switch below never meets another file's -wal/-shm
+    build_path = 'hr_database.db.tmp'
+    remove_database(build_path)
+    
+    # Create new database connection; transactions are managed explicitly below
+    conn = sqlite3.connect(build_path, isolation_level=None)
+    conn.executescript(BULK_LOAD_PRAGMAS)
     cursor = conn.cursor()
     
+    # Schema and data load as one transaction (executescript would commit in between)
+    cursor.execute("BEGIN")
+    
     print("Creating database tables...")
     
     # Read and execute schema
     try:
         with open('schema.sql', 'r') as schema_file:
             schema_sql = schema_file.read()
-            cursor.executescript(schema_sql)
+        for statement in split_sql_statements(schema_sql):
+            cursor.execute(statement)
         print("✓ Database schema created successfully.")
     except FileNotFoundError:
         print("❌ Error: schema.sql file not found!")
+        conn.close()
+        remove_database(build_path)
         return False
     except Exception as e:
         print(f"❌ Error creating schema: {e}")
+        conn.close()
+        remove_database(build_path)
         return False
     
     print("Loading sample data...")
@@ -41,19 +140,34 @@ def init_database():
     try:
         with open('data.sql', 'r') as data_file:
             data_sql = data_file.read()
-            cursor.executescript(data_sql)
+        for statement in split_sql_statements(data_sql):
+            cursor.execute(statement)
+        # Collect planner statistics so the report queries pick their indexes
+        cursor.execute("ANALYZE")
         print("✓ Sample data loaded successfully.")
     except FileNotFoundError:
         print("❌ Error: data.sql file not found!")
+        conn.close()
+        remove_database(build_path)
         return False
     except Exception as e:
         print(f"❌ Error loading data: {e}")
+        conn.close()
+        remove_database(build_path)
         return False
     
-    # Commit changes and close connection
-    conn.commit()
+    # Commit changes, switch to the journal mode the CLI expects and close connection
+    cursor.execute("COMMIT")
+    conn.executescript("PRAGMA locking_mode=NORMAL; PRAGMA journal_mode=WAL;")
     conn.close()
     
+    # As the only connection, closing removed the scratch file's -wal/-shm; move it into place
+    if not remove_database('hr_database.db'):
+        print("❌ Error: hr_database.db is in use by another process (CLI or app.py); close it and retry.")
+        remove_database(build_path)
+        return False
+    os.replace(build_path, 'hr_database.db')
+    
     print("✓ Database initialization completed successfully!")
     return True
 
@@ -69,13 +183,9 @@ def verify_database():
     
     # Check if tables exist
     cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-    tables = [row[0] for row in cursor.fetchall()]
+    tables = [row[0] for row in cursor]
     
-    expected_tables = [
-        'JobTitles', 'Departments', 'Employees', 'Projects', 
-        'EmployeeProjects', 'Attendance', 'LeaveRequests', 
-        'PerformanceReviews', 'Payroll'
-    ]
+    expected_tables = TABLES
     
     print("\nVerifying database structure...")
     for table in expected_tables:
@@ -86,36 +196,33 @@ def verify_database():
     
     # Check record counts
     print("\nChecking record counts...")
+    # init_database() has just run ANALYZE, so its row counts are exact
+    counts = count_records(cursor, expected_tables, use_stats=True)
     for table in expected_tables:
-        try:
-            cursor.execute(f"SELECT COUNT(*) FROM {table}")
-            count = cursor.fetchone()[0]
-            print(f"✓ {table}: {count} records")
-        except Exception as e:
-            print(f"❌ Error counting {table}: {e}")
+        if table in counts:
+            print(f"✓ {table}: {counts[table]} records")
+        else:
+            print(f"❌ Error counting {table}: no such table")
     
     # Check some sample data
     print("\nChecking sample data...")
     
     # Check employees
-    cursor.execute("SELECT COUNT(*) FROM Employees")
-    emp_count = cursor.fetchone()[0]
+    emp_count = counts.get('Employees', 0)
     if emp_count >= 10:
         print(f"✓ Employees: {emp_count} records (minimum 10 required)")
     else:
         print(f"❌ Employees: {emp_count} records (minimum 10 required)")
     
     # Check departments
-    cursor.execute("SELECT COUNT(*) FROM Departments")
-    dept_count = cursor.fetchone()[0]
+    dept_count = counts.get('Departments', 0)
     if dept_count >= 10:
         print(f"✓ Departments: {dept_count} records (minimum 10 required)")
     else:
         print(f"❌ Departments: {dept_count} records (minimum 10 required)")
     
     # Check projects
-    cursor.execute("SELECT COUNT(*) FROM Projects")
-    proj_count = cursor.fetchone()[0]
+    proj_count = counts.get('Projects', 0)
     if proj_count >= 10:
         print(f"✓ Projects: {proj_count} records (minimum 10 required)")
     else:
@@ -169,7 +276,7 @@ def run_sample_queries():
         ORDER BY EmployeeCount DESC
     """)
     
-    for row in cursor.fetchall():
+    for row in cursor:
         print(f"   {row[0]}: {row[1]} employees")
     
     # Sample query 2: Average salary by job title
@@ -183,7 +290,7 @@ def run_sample_queries():
         LIMIT 5
     """)
     
-    for row in cursor.fetchall():
+    for row in cursor:
         print(f"   {row[0]}: ${row[1]:,.2f}")
     
     # Sample query 3: Project budget summary
@@ -197,7 +304,7 @@ def run_sample_queries():
         LIMIT 5
     """)
     
-    for row in cursor.fetchall():
+    for row in cursor:
         budget = row[1] if row[1] else 0
         print(f"   {row[0]}: ${budget:,.2f} (Team: {row[2]} people)")
     
@@ -121,11 +121,18 @@ CREATE TABLE Payroll (
 
 -- Create indexes for better performance
 CREATE INDEX idx_employees_department ON Employees(DepartmentID);
+CREATE INDEX idx_employees_department_salary ON Employees(DepartmentID, Salary DESC);
 CREATE INDEX idx_employees_manager ON Employees(ManagerID);
 CREATE INDEX idx_employees_jobtitle ON Employees(JobTitleID);
+CREATE INDEX idx_employees_name ON Employees(LastName, FirstName);
+CREATE INDEX idx_projects_start_date ON Projects(StartDate, EndDate);
 CREATE INDEX idx_attendance_employee_date ON Attendance(EmployeeID, Date);
+CREATE INDEX idx_attendance_date ON Attendance(Date, EmployeeID, Status);
 CREATE INDEX idx_leave_employee ON LeaveRequests(EmployeeID);
+CREATE INDEX idx_leave_status ON LeaveRequests(Status);
+CREATE INDEX idx_reviews_date ON PerformanceReviews(ReviewDate, Rating);
 CREATE INDEX idx_payroll_employee_month_year ON Payroll(EmployeeID, Month, Year);
+CREATE INDEX idx_payroll_year ON Payroll(Year, EmployeeID);
 CREATE INDEX idx_employee_projects_employee ON EmployeeProjects(EmployeeID);
 CREATE INDEX idx_employee_projects_project ON EmployeeProjects(ProjectID);
 
@@ -4,80 +4,125 @@ HR Database Management System - Test Script
 This script tests the basic functionality of the system.
 """
 
+import functools
 import sqlite3
 import os
 
+# Employee, department and project counts in one round-trip
+_COUNTS_SQL = """
+    SELECT
+        (SELECT COUNT(*) FROM Employees),
+        (SELECT COUNT(*) FROM Departments),
+        (SELECT COUNT(*) FROM Projects)
+"""
+
+# Rank = 1 + higher-paid colleagues in the same department, a lookup on
+# idx_employees_department_salary instead of windowing every partition
+_TOP_SALARIES_SQL = """
+    WITH RankedEmployees AS (
+        SELECT 
+            e.EmployeeID,
+            e.FirstName,
+            e.LastName,
+            e.Salary,
+            d.DepartmentID,
+            d.DepartmentName,
+            1 + (SELECT COUNT(*)
+                 FROM Employees e2
+                 WHERE e2.DepartmentID = e.DepartmentID
+                   AND (e2.Salary > e.Salary
+                        OR (e2.Salary = e.Salary AND e2.EmployeeID < e.EmployeeID))) as SalaryRank
+        FROM Employees e
+        JOIN Departments d ON e.DepartmentID = d.DepartmentID
+    )
+    SELECT 
+        DepartmentName,
+        FirstName,
+        LastName,
+        Salary,
+        SalaryRank
+    FROM RankedEmployees
+    WHERE SalaryRank <= 3
+    ORDER BY DepartmentName, SalaryRank
+    LIMIT 10
+"""
+
+@functools.lru_cache(maxsize=1)
+def get_conn():
+    """Open the test database connection once and reuse it for every query"""
+    # Read-only URI: a missing file fails here instead of being created empty
+    conn = sqlite3.connect('file:hr_database.db?mode=ro', uri=True, cached_statements=256)
+    # Keep sorts and pages in memory; the file is already in WAL mode from init_db.py
+    try:
+        conn.executescript("""
+            PRAGMA temp_store=MEMORY;
+            PRAGMA cache_size=-65536;
+            PRAGMA mmap_size=268435456;
+        """)
+    except sqlite3.DatabaseError:
+        # e.g. "file is not a database"; don't leak the half-opened connection
+        conn.close()
+        raise
+    # Only this script uses the connection, so rows can be named by column
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def close_conn():
+    """Close the shared test connection if it was opened"""
+    if get_conn.cache_info().currsize:
+        get_conn().close()
+        get_conn.cache_clear()
+
 def test_database_connection():
     """Test database connection and basic queries"""
     print("Testing database connection...")
     
-    if not os.path.exists('hr_database.db'):
-        print("❌ Database file not found! Please run 'python init_db.py' first.")
+    try:
+        conn = get_conn()
+    except sqlite3.DatabaseError as e:
+        # Only stat the file on this failure path to tell "missing" from "unreadable"
+        if not os.path.exists('hr_database.db'):
+            print("❌ Database file not found! Please run 'python init_db.py' first.")
+        else:
+            print(f"❌ Database test failed: {e}")
         return False
     
     try:
-        conn = sqlite3.connect('hr_database.db')
-        cursor = conn.cursor()
         print("✅ Database connection successful")
         
         # Test basic queries
         print("\nTesting basic queries...")
         
-        # Count employees
-        cursor.execute("SELECT COUNT(*) FROM Employees")
-        emp_count = cursor.fetchone()[0]
+        # Count employees, departments and projects
+        emp_count, dept_count, proj_count = conn.execute(_COUNTS_SQL).fetchone()
         print(f"✅ Employees count: {emp_count}")
-        
-        # Count departments
-        cursor.execute("SELECT COUNT(*) FROM Departments")
-        dept_count = cursor.fetchone()[0]
         print(f"✅ Departments count: {dept_count}")
-        
-        # Count projects
-        cursor.execute("SELECT COUNT(*) FROM Projects")
-        proj_count = cursor.fetchone()[0]
         print(f"✅ Projects count: {proj_count}")
         
         # Test a complex query
         print("\nTesting complex query (top salaries by department)...")
-        cursor.execute("""
-            WITH RankedEmployees AS (
-                SELECT 
-                    e.EmployeeID,
-                    e.FirstName,
-                    e.LastName,
-                    e.Salary,
-                    d.DepartmentID,
-                    d.DepartmentName,
-                    ROW_NUMBER() OVER (PARTITION BY d.DepartmentID ORDER BY e.Salary DESC) as SalaryRank
-                FROM Employees e
-                JOIN Departments d ON e.DepartmentID = d.DepartmentID
-            )
-            SELECT 
-                DepartmentName,
-                FirstName,
-                LastName,
-                Salary,
-                SalaryRank
-            FROM RankedEmployees
-            WHERE SalaryRank <= 3
-            ORDER BY DepartmentName, SalaryRank
-            LIMIT 10
-        """)
-        
-        results = cursor.fetchall()
-        print(f"✅ Complex query successful, returned {len(results)} rows")
+        if emp_count == 0 or dept_count == 0:
+            # The join has nothing to rank, so the answer is known to be empty
+            print("ℹ️  Skipping complex query: empty tables")
+            results = []
+        else:
+            cursor = conn.execute(_TOP_SALARIES_SQL)
+            
+            # Only the first five rows are shown; the rest are just counted
+            results = cursor.fetchmany(5)
+            row_count = len(results) + sum(1 for _ in cursor)
+            print(f"✅ Complex query successful, returned {row_count} rows")
         
         # Show sample results
         if results:
             print("\nSample results:")
-            for i, row in enumerate(results[:5]):
-                print(f"  {i+1}. {row[0]} - {row[1]} {row[2]} (${row[3]:,.2f}) - Rank {row[4]}")
+            for i, row in enumerate(results):
+                print(f"  {i+1}. {row['DepartmentName']} - {row['FirstName']} {row['LastName']} "
+                      f"(${row['Salary']:,.2f}) - Rank {row['SalaryRank']}")
         
-        conn.close()
         return True
         
-    except Exception as e:
+    except sqlite3.DatabaseError as e:
         print(f"❌ Database test failed: {e}")
         return False
 
@@ -86,24 +131,23 @@ def test_cli_commands():
     print("\nTesting CLI command availability...")
     
     try:
-        import subprocess
-        import sys
+        from click.testing import CliRunner
+        from hr_cli import cli
         
-        # Test help command
-        result = subprocess.run([sys.executable, 'hr_cli.py', '--help'], 
-                              capture_output=True, text=True, timeout=10)
+        # Invoke the commands in-process, reusing the already-imported CLI
+        runner = CliRunner()
+        help_result = runner.invoke(cli, ['--help'])
+        status_result = runner.invoke(cli, ['status'])
         
-        if result.returncode == 0:
+        # Test help command
+        if help_result.exit_code == 0:
             print("✅ CLI help command works")
         else:
             print("❌ CLI help command failed")
             return False
         
         # Test status command
-        result = subprocess.run([sys.executable, 'hr_cli.py', 'status'], 
-                              capture_output=True, text=True, timeout=10)
-        
-        if result.returncode == 0:
+        if status_result.exit_code == 0:
             print("✅ CLI status command works")
         else:
             print("❌ CLI status command failed")
@@ -127,6 +171,9 @@ def main():
     # Test CLI
     cli_test = test_cli_commands()
     
+    # A read-only connection cannot remove the WAL files, so don't let it close last
+    close_conn()
+    
     print("\n" + "=" * 60)
     if db_test and cli_test:
         print("✅ All tests passed! System is working correctly.")